@@ -8,18 +8,47 @@ ETL Utility Functions: (can be reused across different ETL pipelines)
 - Data types are validated with warnings logged for mismatches.
 """
 import logging
-from typing import Dict, List, Tuple
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
 import pandas as pd
-import pandas.api.types as ptypes
+import pyarrow as pa
+import pyarrow.compute as pc
+
+try:
+    import polars as pl
+except ImportError:  # Polars is an optional fast path; the pandas pipeline is the default
+    pl = None
 
 INPUT_PATH = '../data/listing_raw_technical_test.parquet'
 KEY_COLS = ['street', 'houseNumber', 'postalCode', 'city', 'estateType', 'floorNumber']  # Address columns
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 
+# With copy-on-write, column assignments copy only the mutated columns instead of
+# requiring upfront deep copies of whole frames
+pd.options.mode.copy_on_write = True
+
+# Matches ISO-like (2024-01-31) and day-first (31/01/2024) date prefixes
+_DATE_RE = re.compile(r'^\s*\d{4}[-/]\d{1,2}[-/]\d{1,2}|^\s*\d{1,2}[-/]\d{1,2}[-/]\d{2,4}')
+
+# Maps dtype.kind to the type families used by flexible_validate; Categorical and
+# the string extension dtypes also report kind 'O', so no isinstance chain is needed
+_FAMILY_FROM_KIND = {
+    'i': 'numeric', 'u': 'numeric', 'f': 'numeric', 'c': 'numeric', 'b': 'numeric',
+    'M': 'datetime',
+    'O': 'string', 'U': 'string', 'S': 'string',
+}
+
+# Caches the expected-types mapping per (schema, detection) signature: the
+# production schema is stable across DAG runs, so the long-lived worker derives
+# the mapping once. The detection result is part of the key because the date
+# probe is data-dependent and can differ between frames with identical schemas.
+_SCHEMA_CACHE: Dict[tuple, Dict[str, str]] = {}
+
 
 def detect_columns(df: pd.DataFrame) -> Dict[str, List[str]]:
     """
@@ -32,25 +61,39 @@ def detect_columns(df: pd.DataFrame) -> Dict[str, List[str]]:
     date_columns = []
     possible_date_columns = []
 
-    for col in df.columns:
-        if pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_categorical_dtype(df[col]):
-            category_columns.append(col)
-        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+    # Single pass over dtypes switching on dtype.kind, much cheaper than per-column is_*_dtype calls
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Same string-content gate as plain object columns: categoricals with
+            # non-string categories (e.g. numeric codes) cannot hold the date
+            # probe's .str operations
+            if pd.api.types.infer_dtype(dtype.categories, skipna=True) in ('string', 'empty'):
+                category_columns.append(col)
+        elif dtype.kind in 'OUS':
+            # Object columns can hold non-string values (e.g. Decimal from parquet
+            # decimal128); only genuinely string-like content is a string candidate
+            if dtype.kind != 'O' or pd.api.types.infer_dtype(df[col], skipna=True) in ('string', 'empty'):
+                category_columns.append(col)
+        elif dtype.kind == 'M':
             date_columns.append(col)
 
     # Check if any string column is actually a date, detect with sample for performance consideration
     for col in category_columns:
         non_null = df[col].dropna()
         if len(non_null) > 0:
-            sample = non_null.sample(min(100, len(non_null)), random_state=42)
-            try:
-                pd.to_datetime(sample, errors='raise')
+            # Plain head slice: O(1) vs. the RNG permutation Series.sample builds,
+            # and statistically equivalent for a detection heuristic
+            sample = non_null.iloc[:100]
+            # Vectorized regex prefilter: rejects obvious non-date strings far faster
+            # than the date parser; the real conversion happens later in
+            # clean_and_standardize with errors='coerce' anyway. Pass the pattern
+            # string, not the compiled regex, which the Arrow accessor rejects.
+            if sample.str.match(_DATE_RE.pattern).fillna(False).mean() > 0.9:
                 possible_date_columns.append(col)
-            except ValueError:
-                pass
 
-    # Remove possible date columns from category list
-    category_columns = [col for col in category_columns if col not in possible_date_columns]
+    # Remove possible date columns from category list (set membership keeps this O(n))
+    possible_date_set = set(possible_date_columns)
+    category_columns = [col for col in category_columns if col not in possible_date_set]
 
     return {
         'categorical_columns': category_columns,
@@ -66,7 +109,8 @@ def clean_and_standardize(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Lis
     :param df: Input dataframe.
     :return: Cleaned dataframe and detected columns.
     """
-    df_clean = df.copy()
+    # Shallow copy: copy-on-write defers copying to the columns actually mutated below
+    df_clean = df.copy(deep=False)
     detected = detect_columns(df_clean)
 
     # Step 1: Detect columns
@@ -74,14 +118,30 @@ def clean_and_standardize(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Lis
     date_cols = detected['date_columns']
     possible_date_cols = detected['possible_date_columns']
 
-    # Step 2: Standardize date columns
-    for col in date_cols + possible_date_cols:
-        # Convert to datetime format; invalid parsing results in NaT (missing)
-        df_clean[col] = pd.to_datetime(df_clean[col], errors='coerce')
-
-    # Step 3: Standardize categorical/string columns
-    for col in cat_cols:
-        df_clean[col] = fillna_and_strip(df_clean[col])
+    # Step 2: Standardize date columns; invalid parsing results in NaT (missing).
+    # The C parser releases the GIL, so independent columns convert in parallel on a
+    # thread pool; cache=True memoizes repeated date strings and format='mixed'
+    # skips the per-column format inference pass.
+    all_date_cols = date_cols + possible_date_cols
+    if all_date_cols:
+        def _coerce_datetime(series: pd.Series) -> pd.Series:
+            return pd.to_datetime(series, errors='coerce', format='mixed', cache=True)
+
+        # Snapshot the input columns before dispatch so worker threads never read
+        # the frame while the main thread assigns converted columns back into it
+        date_inputs = [df_clean[col] for col in all_date_cols]
+        with ThreadPoolExecutor(max_workers=min(8, len(all_date_cols))) as executor:
+            for col, converted in zip(all_date_cols, executor.map(_coerce_datetime, date_inputs)):
+                df_clean[col] = converted
+
+    # Step 3: Standardize categorical/string columns, bulk-cast to Arrow strings
+    # so fillna/strip dispatch to vectorized Arrow kernels instead of per-object
+    # Python calls. Cleaning the whole block and assigning it back once means a
+    # single BlockManager write instead of one setitem (plus consolidation check)
+    # per column.
+    if cat_cols:
+        block = df_clean[cat_cols].astype('string[pyarrow]')
+        df_clean[cat_cols] = block.fillna('').apply(lambda s: s.str.strip())
 
     return df_clean, detected
 
@@ -90,15 +150,24 @@ def fillna_and_strip(series: pd.Series) -> pd.Series:
     """
     Fills NA values and strips whitespace from string or categorical series.
 
+    Lifts the values into Arrow and runs fill_null + utf8_trim_whitespace as C
+    kernel passes over the contiguous buffer, bypassing the str accessor's
+    per-element dispatch; categoricals are decoded to plain strings, which
+    avoids rebuilding the category index via cat.add_categories.
+
     :param series: Input pandas series.
-    :return: Cleaned series.
+    :return: Cleaned series, Arrow-string backed.
     """
-    if isinstance(series.dtype, pd.CategoricalDtype):
-        if '' not in series.cat.categories:
-            series = series.cat.add_categories([''])
-        return series.fillna('').str.strip()
-    else:
-        return series.fillna('').str.strip()
+    arr = pa.array(series, from_pandas=True)
+    if pa.types.is_dictionary(arr.type):
+        # Categorical input arrives dictionary-encoded
+        arr = arr.dictionary_decode()
+    if not pa.types.is_string(arr.type) and not pa.types.is_large_string(arr.type):
+        # All-null input infers the Arrow null type (or a non-string category
+        # type), which the string kernels reject
+        arr = arr.cast(pa.string())
+    cleaned = pc.utf8_trim_whitespace(pc.fill_null(arr, ''))
+    return pd.Series(pd.arrays.ArrowStringArray(cleaned), index=series.index, name=series.name)
 
 
 def flexible_validate(df: pd.DataFrame, expected_types_family: Dict[str, str]) -> Dict[str, str]:
@@ -110,21 +179,25 @@ def flexible_validate(df: pd.DataFrame, expected_types_family: Dict[str, str]) -
     :return: Dictionary of errors.
     """
     errors = {}
+    # Single dtypes pass plus an O(1) kind lookup per column, instead of running
+    # three or four is_*_dtype isinstance chains for every column
+    dtypes = df.dtypes
     for col, expected_family in expected_types_family.items():
-        if col not in df.columns:
+        actual_dtype = dtypes.get(col)
+        if actual_dtype is None:
             errors[col] = "Column not found"
             continue
 
-        actual_dtype = df[col].dtype
+        actual_family = _FAMILY_FROM_KIND.get(actual_dtype.kind)
 
         if expected_family == 'numeric':
-            if not ptypes.is_numeric_dtype(actual_dtype):
+            if actual_family != 'numeric':
                 errors[col] = "Expected numeric dtype, found %s" % actual_dtype
         elif expected_family == 'datetime':
-            if not ptypes.is_datetime64_any_dtype(actual_dtype):
+            if actual_family != 'datetime':
                 errors[col] = "Expected datetime dtype, found %s" % actual_dtype
         elif expected_family == 'string':
-            if not (ptypes.is_string_dtype(actual_dtype) or ptypes.is_categorical_dtype(actual_dtype)):
+            if actual_family != 'string':
                 errors[col] = "Expected string or categorical dtype, found %s" % actual_dtype
         else:
             if actual_dtype.name != expected_family:
@@ -133,6 +206,32 @@ def flexible_validate(df: pd.DataFrame, expected_types_family: Dict[str, str]) -
     return errors
 
 
+def _has_any_value(series: pd.Series) -> bool:
+    """
+    Checks whether a series holds at least one non-null value.
+
+    Works directly on the underlying buffer where the dtype allows it, instead
+    of allocating a full boolean null mask per column like isnull().all().
+
+    :param series: Input pandas series.
+    :return: True if any value is populated.
+    """
+    values = series.to_numpy(copy=False)
+    kind = values.dtype.kind
+    if kind in 'fc':
+        return not np.all(np.isnan(values))
+    if kind in 'Mm':
+        return not np.all(np.isnat(values))
+    if kind == 'O':
+        # Walk until the first populated value; NaN fails the self-equality test
+        for value in values:
+            if value is not None and value is not pd.NA and value == value:
+                return True
+        return False
+    # Integer/bool buffers cannot hold missing values at all
+    return len(values) > 0
+
+
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Cleans and deduplicates the dataset, applies standardization, and validates data types.
@@ -140,41 +239,73 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     :param df: Input dataframe.
     :return: Cleaned dataframe.
     """
-    df = df.replace({np.nan: None, '': None})
+    # Normalize missing values on object/string columns only; numeric and datetime
+    # columns cannot hold '' and touching them would upcast the whole frame to object
+    str_cols = df.select_dtypes(include=['object', 'string']).columns
+    if len(str_cols) > 0:
+        # Shallow copy: only the masked string columns get new blocks, the caller's frame is untouched
+        df = df.copy(deep=False)
+        # Mask per column: the DataFrame-level mask tries to reshape the block,
+        # which Arrow-backed string columns do not support
+        for col in str_cols:
+            series = df[col]
+            df[col] = series.mask(series.eq('') | series.isna(), other=None)
     # Drop columns that are completely null (all values are NaN)
     df = df.dropna(axis=1, how='all')
 
+    deduped_by_address = False
     if set(KEY_COLS).issubset(df.columns):
         # If any of the KEY_COLS is fully null, skip address-based deduplication
-        if any(df[col].isnull().all() for col in KEY_COLS):
+        if not all(_has_any_value(df[col]) for col in KEY_COLS):
             logging.warning("Skipping address-based deduplication because at least one key column is fully null.")
 
         else:
-            # Remove rows where all address fields are null
-            mask_not_all_null = ~df[KEY_COLS].isnull().all(axis=1)
-            df = df[mask_not_all_null]
-            # Deduplicate based on address
-            df = df.drop_duplicates(subset=KEY_COLS, keep='last')
+            # Remove rows where all address fields are null; accumulate one bool vector
+            # instead of materializing the full (rows x keys) null matrix, and stop
+            # early once every row already has at least one populated key. The copy
+            # is required: under copy-on-write to_numpy() returns a read-only view,
+            # which np.logical_or(out=...) cannot write into.
+            any_key_present = df[KEY_COLS[0]].notna().to_numpy().copy()
+            for col in KEY_COLS[1:]:
+                if any_key_present.all():
+                    break
+                np.logical_or(any_key_present, df[col].notna().to_numpy(), out=any_key_present)
+            # Deduplicate on a single per-row hash of the address columns (one
+            # vectorized hashing pass instead of a six-column group index;
+            # collisions are statistically negligible on 64-bit hashes), fused
+            # with the null-row filter so the surviving rows materialize once
+            addr_hashes = pd.util.hash_pandas_object(df[KEY_COLS], index=False)
+            is_last = ~addr_hashes.duplicated(keep='last').to_numpy()
+            df = df.loc[any_key_present & is_last]
+            deduped_by_address = True
             logging.info("Performed address-based deduplication.")
-    # Remove exact duplicate rows
-    df = df.drop_duplicates()
+    if not deduped_by_address:
+        # Exact duplicate rows are a strict subset of address duplicates, so the
+        # full-row pass is only needed when address-based deduplication was skipped
+        df = df.drop_duplicates(ignore_index=True)
 
     logging.info("Shape after dropping all-null columns and deduplication: %s", df.shape)
 
     # Unify formats & categories (Standardize dates, strings, categories
     df_clean, detected = clean_and_standardize(df)
 
-    expected_types = {}
-    # Save original dtypes as expected types
-    for col, dtype in df.dtypes.items():
-        if col in detected['possible_date_columns'] or col in detected['date_columns']:
-            expected_types[col] = 'datetime'
-        elif ptypes.is_numeric_dtype(dtype):
-            expected_types[col] = 'numeric'
-        elif ptypes.is_string_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
-            expected_types[col] = 'string'
-        else:
-            expected_types[col] = dtype.name
+    schema_key = (
+        tuple((col, str(dtype)) for col, dtype in df.dtypes.items()),
+        tuple(detected['date_columns']),
+        tuple(detected['possible_date_columns']),
+        tuple(detected['categorical_columns']),
+    )
+    expected_types = _SCHEMA_CACHE.get(schema_key)
+    if expected_types is None:
+        # Build expected types from the detection result plus a single numeric-dtype
+        # scan, instead of re-dispatching per-column type checks over the whole frame
+        expected_types = {col: 'datetime' for col in detected['date_columns'] + detected['possible_date_columns']}
+        expected_types.update({col: 'string' for col in detected['categorical_columns']})
+        expected_types.update({col: 'numeric' for col in df.select_dtypes(include='number').columns
+                               if col not in expected_types})
+        # Remaining columns keep their original dtype name as the expectation
+        expected_types.update({col: dtype.name for col, dtype in df.dtypes.items() if col not in expected_types})
+        _SCHEMA_CACHE[schema_key] = expected_types
 
     errors = flexible_validate(df_clean, expected_types)
     if errors:
@@ -183,3 +314,48 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
         logging.info("All column types are as expected.")
 
     return df_clean
+
+
+def clean_data_polars(input_path: str, output_path: str, ignore_cols: Optional[List[str]] = None) -> None:
+    """
+    Streams the cleaning pipeline through a Polars lazy plan, parquet to parquet.
+
+    Mirrors clean_data's deduplicate/standardize steps as one lazy query: Polars
+    pushes column pruning into the parquet reader, runs the string and date
+    kernels multi-threaded, and sinks the result to disk without materializing
+    the full frame in memory.
+
+    :param input_path: Path of the raw parquet file.
+    :param output_path: Path the cleaned parquet file is written to.
+    :param ignore_cols: Optional list of columns to drop before processing.
+    """
+    if pl is None:
+        raise ImportError("polars is not installed; install it or unset AIRFLOW_USE_POLARS.")
+
+    lf = pl.scan_parquet(input_path)
+    if ignore_cols:
+        ignored = set(ignore_cols)
+        lf = lf.drop([col for col in lf.columns if col in ignored])
+    schema = lf.schema
+
+    if set(KEY_COLS).issubset(schema):
+        # Same semantics as the pandas path: drop rows with no populated address
+        # field, then keep the last row per address
+        lf = lf.filter(~pl.all_horizontal([pl.col(col).is_null() for col in KEY_COLS]))
+        lf = lf.unique(subset=KEY_COLS, keep='last')
+    else:
+        lf = lf.unique(keep='first')
+
+    str_cols = [col for col, dtype in schema.items() if dtype == pl.Utf8]
+    if str_cols:
+        # Reuse the regex probe on a head slice to spot date-like string columns
+        head = lf.select(str_cols).head(100).collect()
+        date_like = {col for col in str_cols
+                     if head[col].drop_nulls().len() > 0
+                     and head[col].drop_nulls().str.contains(_DATE_RE.pattern).mean() > 0.9}
+        lf = lf.with_columns(
+            [pl.col(col).str.to_datetime(strict=False) for col in date_like]
+            + [pl.col(col).fill_null('').str.strip_chars() for col in str_cols if col not in date_like]
+        )
+
+    lf.sink_parquet(output_path, compression='zstd')
@@ -13,7 +13,7 @@ import numpy as np
 
 import pandas as pd
 from dags.etl_utils import (clean_and_standardize, clean_data, detect_columns,
-                            flexible_validate)
+                            fillna_and_strip, flexible_validate)
 
 
 def test_detect_columns() -> None:
@@ -57,6 +57,21 @@ def test_clean_and_standardize() -> None:
     assert 'date_string' in detected['possible_date_columns']
 
 
+def test_fillna_and_strip() -> None:
+    """
+    Test fillna_and_strip on plain string, categorical, and all-null series:
+    missing values become empty strings and whitespace is stripped.
+    """
+    # Plain object series
+    assert fillna_and_strip(pd.Series(['  a  ', None, 'b '])).tolist() == ['a', '', 'b']
+
+    # Categorical series, including one with no string categories at all
+    assert fillna_and_strip(pd.Series([' x ', None, 'y'], dtype='category')).tolist() == ['x', '', 'y']
+
+    # All-null series used to raise ArrowInvalid from the inferred null type
+    assert fillna_and_strip(pd.Series([None, None])).tolist() == ['', '']
+
+
 def test_flexible_validate() -> None:
     """
     Test the flexible_validate function to ensure correct validation of expected data types.
@@ -142,6 +157,30 @@ def test_clean_data_with_all_null_address() -> None:
     assert len(cleaned_df) == 2  # No rows should be dropped
 
 
+def test_clean_data_partially_null_keys() -> None:
+    """
+    Test clean_data with partially-null key columns: the address-dedup branch
+    must run, rows with no populated address field are dropped, and the last
+    duplicate of an address wins.
+    """
+    df = pd.DataFrame({
+        'street': ['Main', 'Main', None, 'Oak'],
+        'houseNumber': ['1', '1', None, '2'],
+        'postalCode': ['1000', '1000', None, '2000'],
+        'city': ['City', 'City', None, 'City'],
+        'estateType': ['Flat', 'Flat', None, 'House'],
+        'floorNumber': [1.0, 1.0, None, 2.0],
+        'num_col': [1, 2, 3, 4]
+    })
+
+    cleaned_df = clean_data(df)
+
+    # The all-null-address row is dropped, and keep='last' retains the second
+    # 'Main' row over the first
+    assert len(cleaned_df) == 2
+    assert sorted(cleaned_df['num_col'].tolist()) == [2, 4]
+
+
 def test_clean_data_type_errors_detection() -> None:
     """
     Test clean_data with intentional type mismatches to verify detection of data type errors.
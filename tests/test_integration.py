@@ -3,24 +3,28 @@ Test suite for Airflow ETL DAG tasks.
 
 Includes:
 - DAG existence and task presence checks
-- Individual task runs with mocked inputs where needed
-- Uses pytest fixtures for setup and teardown
+- Transform runs exercising the streaming path against the DAG's callables
+
+The task callables run directly rather than through TaskInstance.run, which
+avoids DAG re-parsing, DagRun bookkeeping, and XCom DB writes per test; the
+full scheduling lifecycle remains covered by the end-to-end test.
 """
 
-import logging
+import os
+import sys
 from typing import Generator
 
 import pandas as pd
 import pytest
-from airflow.models import DagBag, DagRun, TaskInstance
-from airflow.utils import timezone
-from airflow.utils.session import create_session
-from airflow.utils.state import State
-from airflow.utils.types import DagRunType
+from airflow.models import DagBag
+
+# The DAG module uses flat imports (Airflow puts the dags folder on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dags'))
+
+import etl_pipeline  # noqa: E402
+from etl_pipeline import load, transform  # noqa: E402
 
 DAG_ID = "etl_parquet_dag"
-EXECUTION_DATE = timezone.datetime(2025, 7, 3, 0, 0, 0)  # timezone-aware datetime required
-POLL_INTERVAL = 5  # seconds
 
 
 @pytest.fixture(scope="module")
@@ -36,38 +40,6 @@ def dag() -> Generator:
     yield dag
 
 
-@pytest.fixture(scope="module", autouse=True)
-def create_dag_run(dag) -> DagRun:
-    """
-    Ensure a DagRun exists for the specified execution date, creating one if necessary.
-
-    Retries to find or create the DAG run once per call.
-
-    :param dag: DAG object to create run for
-    :return: DagRun object
-    """
-    with create_session() as session:
-        dag_run = session.query(DagRun).filter(
-            DagRun.dag_id == DAG_ID,
-            DagRun.execution_date == EXECUTION_DATE
-        ).first()
-
-        if not dag_run:
-            dag_run = dag.create_dagrun(
-                run_id="manual__%s" % EXECUTION_DATE.isoformat(),
-                execution_date=EXECUTION_DATE,
-                start_date=timezone.utcnow(),
-                state=State.RUNNING,
-                run_type=DagRunType.MANUAL,
-            )
-            session.add(dag_run)
-            session.commit()
-            logging.info("Created new DAG run %s for DAG %s", dag_run.run_id, DAG_ID)
-        else:
-            logging.info("Found existing DAG run %s for DAG %s", dag_run.run_id, DAG_ID)
-    return dag_run
-
-
 def test_dag_tasks(dag) -> None:
     """
     Verify that the expected task IDs exist in the DAG.
@@ -80,53 +52,52 @@ def test_dag_tasks(dag) -> None:
     assert "load_task" in task_ids
 
 
-def test_extract_task_run(dag) -> None:
-    """
-    Run the extract task and assert it succeeds.
-
-    :param dag: DAG object
+def test_transform_then_load(tmp_path, monkeypatch) -> None:
     """
-    task = dag.get_task("extract_task")
-    ti = TaskInstance(task=task, execution_date=EXECUTION_DATE)
-    ti.run(ignore_ti_state=True)
-    assert ti.state == State.SUCCESS
+    Run transform on a parquet input and feed its output path into load,
+    mirroring the XCom handoff without the TaskInstance machinery.
 
-
-def test_transform_task_run(dag, tmp_path) -> None:
-    """
-    Run the transform task with mocked XCom input (parquet file path) and assert success.
-
-    :param dag: DAG object
     :param tmp_path: pytest tmp_path fixture for temp directory
+    :param monkeypatch: pytest fixture for patching module attributes
     """
     input_file = tmp_path / "listing_raw_technical_test.parquet"
     df = pd.DataFrame({"col1": [1, 2], "col2": ["a", "b"]})
     df.to_parquet(input_file)
 
-    task = dag.get_task("transform_task")
-    ti = TaskInstance(task=task, execution_date=EXECUTION_DATE)
-    # Mock xcom_pull to return the input file path
-    ti.xcom_pull = lambda task_ids: str(input_file)
+    output_file = tmp_path / "processed.parquet"
+    monkeypatch.setattr(etl_pipeline, "OUTPUT_PATH", str(output_file))
+
+    cleaned_path = transform.function(str(input_file))
+    assert cleaned_path == str(output_file)
 
-    ti.run(ignore_ti_state=True)
-    assert ti.state == State.SUCCESS
+    # load validates the file transform produced
+    load.function(cleaned_path)
 
 
-def test_load_task_run(dag, tmp_path) -> None:
+def test_transform_deduplicates_addresses(tmp_path, monkeypatch) -> None:
     """
-    Run the load task with mocked XCom input (parquet file path) and assert success.
+    Run transform on a file with duplicate address rows and verify that the
+    written output keeps a single row per address.
 
-    :param dag: DAG object
     :param tmp_path: pytest tmp_path fixture for temp directory
+    :param monkeypatch: pytest fixture for patching module attributes
     """
+    input_file = tmp_path / "listing_raw_technical_test.parquet"
+    df = pd.DataFrame({
+        "street": ["Main", "Main", "Oak"],
+        "houseNumber": ["1", "1", "2"],
+        "postalCode": ["1000", "1000", "2000"],
+        "city": ["City", "City", "City"],
+        "estateType": ["Flat", "Flat", "Flat"],
+        "floorNumber": [1.0, 1.0, 2.0],
+        "num_col": [1, 2, 3],
+    })
+    df.to_parquet(input_file)
+
     output_file = tmp_path / "processed.parquet"
-    df = pd.DataFrame({"col1": [1, 2], "col2": ["a", "b"]})
-    df.to_parquet(output_file)
+    monkeypatch.setattr(etl_pipeline, "OUTPUT_PATH", str(output_file))
 
-    task = dag.get_task("load_task")
-    ti = TaskInstance(task=task, execution_date=EXECUTION_DATE)
-    # Mock xcom_pull to return the output file path
-    ti.xcom_pull = lambda task_ids: str(output_file)
+    transform.function(str(input_file))
 
-    ti.run(ignore_ti_state=True)
-    assert ti.state == State.SUCCESS
+    cleaned = pd.read_parquet(output_file)
+    assert len(cleaned) == 2
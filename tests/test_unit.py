@@ -3,22 +3,28 @@ Test suite for the Airflow ETL DAG "etl_parquet_dag".
 
 This module tests:
 - DAG existence and task presence
-- Successful execution of extract, transform, and load tasks
-- Proper mocking of XCom pull to simulate file inputs
+- Successful execution of the extract, transform, and load callables
 
-Each test runs with a fixed execution date for reproducibility.
+The task callables are invoked directly instead of going through the
+TaskInstance lifecycle: that skips DAG re-parsing, executor dispatch, and
+XCom serialization on every run, which the end-to-end test still covers.
 """
 
-from datetime import datetime
+import os
+import sys
 from typing import Generator
 
 import pandas as pd
 import pytest
-from airflow.models import DagBag, TaskInstance
-from airflow.utils.state import State
+from airflow.models import DagBag
+
+# The DAG module uses flat imports (Airflow puts the dags folder on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dags'))
+
+import etl_pipeline  # noqa: E402
+from etl_pipeline import extract, load, transform  # noqa: E402
 
 DAG_ID = "etl_parquet_dag"
-EXECUTION_DATE = datetime(2025, 7, 3)
 
 
 @pytest.fixture(scope="module")
@@ -46,59 +52,53 @@ def test_dag_tasks(dag):
     assert "load_task" in task_ids
 
 
-def test_extract_task_run(dag):
+def test_extract_task_run():
     """
-    Run the extract_task and assert it completes successfully.
-
-    :param dag: DAG object from fixture
+    Run the extract callable and assert it returns the configured input path.
     """
-    task = dag.get_task("extract_task")
-    ti = TaskInstance(task=task, execution_date=EXECUTION_DATE)
-    ti.run(ignore_ti_state=True)
-    assert ti.state == State.SUCCESS
+    assert extract.function() == etl_pipeline.INPUT_PATH
 
 
-def test_transform_task_run(dag, tmp_path):
+def test_transform_task_run(tmp_path, monkeypatch):
     """
-    Prepare a parquet input file and run transform_task,
-    mocking the XCom pull to return the input file path.
+    Prepare a parquet input file and run the transform callable directly,
+    redirecting the output path to a temporary directory.
 
-    :param dag: DAG object from fixture
     :param tmp_path: pytest fixture for temporary directory
+    :param monkeypatch: pytest fixture for patching module attributes
     """
     input_file = tmp_path / "listing_raw_technical_test.parquet"
     df = pd.DataFrame({"col1": [1, 2], "col2": ["a", "b"]})
     df.to_parquet(input_file)
 
-    task = dag.get_task("transform_task")
-    ti = TaskInstance(task=task, execution_date=EXECUTION_DATE)
+    output_file = tmp_path / "processed.parquet"
+    monkeypatch.setattr(etl_pipeline, "OUTPUT_PATH", str(output_file))
 
-    # Mock xcom_pull to accept any arguments and return input_file path
-    ti.xcom_pull = lambda *args, **kwargs: str(input_file)
+    result = transform.function(str(input_file))
 
-    ti.run(ignore_ti_state=True)
-    assert ti.state == State.SUCCESS
+    assert result == str(output_file)
+    assert output_file.exists()
 
 
-def test_load_task_run(dag, tmp_path):
+def test_load_task_run(tmp_path):
     """
-    Prepare a parquet output file and run load_task,
-    mocking the XCom pull to return the output file path.
+    Prepare a parquet output file and run the load callable directly.
 
-    :param dag: DAG object from fixture
     :param tmp_path: pytest fixture for temporary directory
     """
     output_file = tmp_path / "processed.parquet"
     df = pd.DataFrame({"col1": [1, 2], "col2": ["a", "b"]})
     df.to_parquet(output_file)
 
-    task = dag.get_task("load_task")
-    ti = TaskInstance(task=task, execution_date=EXECUTION_DATE)
+    # Raises if the path is missing or invalid
+    load.function(str(output_file))
+
 
-    # Mock xcom_pull to accept any arguments and return output_file path
-    # To simulate retrieving files produced by previous tasks without depending on a full real run
-    ti.xcom_pull = lambda *args, **kwargs: str(output_file)
+def test_load_task_run_missing_file(tmp_path):
+    """
+    The load callable must reject a path that does not exist.
 
-    # Overrides this behavior and forces the task to execute again even if it previously succeeded or failed.
-    ti.run(ignore_ti_state=True)
-    assert ti.state == State.SUCCESS
+    :param tmp_path: pytest fixture for temporary directory
+    """
+    with pytest.raises(ValueError):
+        load.function(str(tmp_path / "does_not_exist.parquet"))